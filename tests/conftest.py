@@ -0,0 +1,48 @@
+#  Copyright (c) 2025 by EOPF Sample Service team and contributors
+#  Permissions are hereby granted under the terms of the Apache 2.0 License:
+#  https://opensource.org/license/apache-2-0.
+
+import itertools
+from unittest.mock import MagicMock
+
+import pytest
+import xarray as xr
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "mock_xarray_ret(factory=..., num_missing=0): replace xarray.open_dataset by a "
+        "mock returning the dataset created by factory(); the first num_missing "
+        "calls raise a FileNotFoundError.",
+    )
+
+
+@pytest.fixture(scope="module")
+def vcr_config():
+    # TODO: match on "body" as well, once the cassettes are re-recorded with
+    #       the STAC search limit and fields, using `--record-mode rewrite`
+    return {
+        "decode_compressed_response": True,
+        "match_on": ["method", "scheme", "host", "path", "query"],
+    }
+
+
+@pytest.fixture(autouse=True)
+def mock_open_dataset(request, monkeypatch):
+    marker = request.node.get_closest_marker("mock_xarray_ret")
+    if marker is None:
+        return None
+
+    ds = marker.kwargs["factory"]()
+    num_missing = marker.kwargs.get("num_missing", 0)
+    call_count = itertools.count()
+
+    def open_dataset(*args, **kwargs):
+        if next(call_count) < num_missing:
+            raise FileNotFoundError("missing file")
+        return ds
+
+    mock = MagicMock(side_effect=open_dataset)
+    monkeypatch.setattr(xr, "open_dataset", mock)
+    return mock
@@ -5,15 +5,50 @@
 import datetime
 from unittest import TestCase
 
+import dask.array as da
+import numpy as np
 import pystac
 import pytest
 import xarray as xr
+from xcube.core.store import DataStoreError
 
-from xcube_eopf.prodhandlers.sentinel2 import group_items, _get_bounding_box
+from xcube_eopf.prodhandlers.sentinel2 import (
+    GroupedItems,
+    Sen2L2AProductHandler,
+    _get_bounding_box,
+    _get_native_chunk_size,
+    _insert_tile_data,
+    group_items,
+)
 
 
 class Sentinel2Test(TestCase):
 
+    def test_prepare_stac_queries(self):
+        query = Sen2L2AProductHandler().prepare_stac_queries(
+            "sentinel-2-l2a",
+            dict(
+                bbox=[10.0, 53.0, 11.0, 54.0],
+                time_range=["2024-06-01", "2024-06-10"],
+                crs="EPSG:4326",
+            ),
+        )
+        self.assertEqual(["sentinel-2-l2a"], query["collections"])
+        # all item fields read by the Sentinel-2 handler must be requested
+        for field in [
+            "id",
+            "bbox",
+            "properties.datetime",
+            "properties.deprecated",
+            "properties.grid:code",
+            "properties.proj:code",
+            "properties.proj:bbox",
+            "assets.product",
+            "assets.B02_10m",
+        ]:
+            self.assertIn(field, query["fields"]["include"])
+        self.assertEqual(["links"], query["fields"]["exclude"])
+
     def test_group_items(self):
         item0 = pystac.Item(
             id="S2A_MSIL2A_20240604T103031_N0500_R108_T32UQD_20240604T120000",
@@ -23,6 +58,7 @@ class Sentinel2Test(TestCase):
             properties={
                 "datetime_nominal": datetime.datetime(2024, 6, 4, 10, 30, 31),
                 "grid:code": "32UQD",
+                "proj:code": "EPSG:32632",
             },
         )
         item1 = pystac.Item(
@@ -33,14 +69,65 @@ class Sentinel2Test(TestCase):
             properties={
                 "datetime_nominal": datetime.datetime(2024, 6, 4, 10, 30, 31),
                 "grid:code": "32UQD",
+                "proj:code": "EPSG:32632",
             },
         )
 
         grouped_item = group_items([item0, item1])
-        self.assertIsInstance(grouped_item, xr.DataArray)
-        self.assertEqual(dict(time=1, tile_id=1), grouped_item.sizes)
-        self.assertIsInstance(grouped_item[0, 0].item(), list)
-        self.assertEqual(2, len(grouped_item[0, 0].item()))
+        self.assertIsInstance(grouped_item, GroupedItems)
+        self.assertEqual(1, len(grouped_item.times))
+        self.assertEqual(["32UQD"], list(grouped_item.tile_ids))
+        cell = grouped_item.cells[(grouped_item.times[0], "32UQD")]
+        self.assertIsInstance(cell, list)
+        self.assertEqual(2, len(cell))
+        self.assertEqual({"32UQD": "EPSG:32632"}, grouped_item.tile_crss)
+
+        # items without CRS are rejected
+        del item0.properties["proj:code"]
+        with self.assertRaises(DataStoreError) as cm:
+            group_items([item0, item1])
+        self.assertIn("proj:code", str(cm.exception))
+
+    def test_group_items_tile_crs_from_first_item(self):
+        items = [
+            pystac.Item(
+                id=f"S2A_MSIL2A_20240604T103031_N0500_R108_T32UQD_2024060{i}T120000",
+                geometry=None,
+                bbox=[0, 50, 1, 51],
+                datetime=datetime.datetime(2024, 6, 4, 10, 30, 31),
+                properties={
+                    "datetime_nominal": datetime.datetime(2024, 6, 4, 10, 30, 31),
+                    "grid:code": "32UQD",
+                    "proj:code": crs,
+                },
+            )
+            for i, crs in enumerate(["EPSG:32632", "EPSG:32633"])
+        ]
+        grouped_item = group_items(items)
+        self.assertEqual({"32UQD": "EPSG:32632"}, grouped_item.tile_crss)
+        grouped_item = group_items(items[::-1])
+        self.assertEqual({"32UQD": "EPSG:32633"}, grouped_item.tile_crss)
+
+    def test_group_items_tile_bbox_from_first_item(self):
+        items = [
+            pystac.Item(
+                id=f"S2A_MSIL2A_20240604T103031_N0500_R108_T32UQD_2024060{i}T120000",
+                geometry=None,
+                bbox=[0, 50, 1, 51],
+                datetime=datetime.datetime(2024, 6, 4, 10, 30, 31),
+                properties={
+                    "datetime_nominal": datetime.datetime(2024, 6, 4, 10, 30, 31),
+                    "grid:code": "32UQD",
+                    "proj:code": "EPSG:32632",
+                    "proj:bbox": bbox,
+                },
+            )
+            for i, bbox in enumerate([[0, 0, 10, 10], [0, 0, 20, 20]])
+        ]
+        grouped_item = group_items(items)
+        self.assertEqual({"32UQD": [0, 0, 10, 10]}, grouped_item.tile_bboxes)
+        grouped_item = group_items(items[::-1])
+        self.assertEqual({"32UQD": [0, 0, 20, 20]}, grouped_item.tile_bboxes)
 
     def test_get_bounding_box(self):
         item0 = pystac.Item(
@@ -51,6 +138,7 @@ class Sentinel2Test(TestCase):
             properties={
                 "datetime_nominal": datetime.datetime(2024, 6, 4, 10, 30, 31),
                 "grid:code": "32UQD",
+                "proj:code": "EPSG:32632",
                 "proj:bbox": [10000, 10000, 20000, 20000],
             },
             assets={"B02_10m": pystac.Asset("https://test")},
@@ -63,6 +151,7 @@ class Sentinel2Test(TestCase):
             properties={
                 "datetime_nominal": datetime.datetime(2024, 6, 4, 10, 30, 31),
                 "grid:code": "32UQE",
+                "proj:code": "EPSG:32632",
             },
             assets={
                 "B02_10m": pystac.Asset(
@@ -79,6 +168,7 @@ class Sentinel2Test(TestCase):
             properties={
                 "datetime_nominal": datetime.datetime(2024, 6, 4, 10, 30, 31),
                 "grid:code": "32UQF",
+                "proj:code": "EPSG:32632",
             },
             assets={"B02_10m": pystac.Asset("https://test")},
         )
@@ -90,3 +180,34 @@ class Sentinel2Test(TestCase):
             Exception, match="Required metadata field proj:bbox not found"
         ):
             _ = _get_bounding_box(group_items([item0, item1, item2]))
+
+    def test_insert_tile_data(self):
+        plane = da.full((4, 5), np.nan, chunks=2)
+        tile = xr.DataArray(
+            np.ones((2, 3)),
+            dims=("y", "x"),
+            coords=dict(x=[15.0, 25.0, 35.0], y=[25.0, 15.0]),
+        )
+        plane = _insert_tile_data(plane, tile, 5.0, 35.0, 10)
+        expected = np.full((4, 5), np.nan)
+        expected[1:3, 1:4] = 1
+        np.testing.assert_equal(expected, plane.compute())
+        # tiles outside the plane are rejected
+        with self.assertRaises(DataStoreError):
+            _insert_tile_data(plane, tile, 25.0, 35.0, 10)
+        with self.assertRaises(DataStoreError):
+            _insert_tile_data(plane, tile, 5.0, 15.0, 10)
+        # tiles off the pixel grid are rejected
+        with self.assertRaises(DataStoreError):
+            _insert_tile_data(plane, tile, 0.0, 35.0, 10)
+        with self.assertRaises(DataStoreError):
+            _insert_tile_data(plane, tile, 5.0, 40.0, 10)
+        # tiny floating point deviations are tolerated
+        plane = da.full((4, 5), np.nan, chunks=2)
+        plane = _insert_tile_data(plane, tile, 5.0 + 1e-9, 35.0 - 1e-9, 10)
+        np.testing.assert_equal(expected, plane.compute())
+
+    def test_get_native_chunk_size(self):
+        self.assertEqual(1830, _get_native_chunk_size(10))
+        self.assertEqual(915, _get_native_chunk_size(20))
+        self.assertEqual(305, _get_native_chunk_size(60))
@@ -6,11 +6,15 @@ import datetime
 import logging
 from unittest import TestCase
 
+import numpy as np
 import pystac
 import xarray as xr
+from xcube.core.store import DataStoreError
 
 from xcube_eopf.prodhandlers.sentinel3 import (
     IgnoreZeroSizedDimension,
+    Sen3Ol1EfrProductHandler,
+    _assert_same_spatial_coords,
     _get_base_id,
     group_items,
 )
@@ -18,6 +22,24 @@ from xcube_eopf.prodhandlers.sentinel3 import (
 
 class Sentinel3Test(TestCase):
 
+    def test_prepare_stac_queries(self):
+        query = Sen3Ol1EfrProductHandler().prepare_stac_queries(
+            "sentinel-3-olci-l1-efr",
+            dict(bbox=[5.0, 53.0, 10.0, 57.0], time_range=["2026-03-01", "2026-03-03"]),
+        )
+        self.assertEqual(["sentinel-3-olci-l1-efr"], query["collections"])
+        # all item fields read by the Sentinel-3 handler must be requested
+        for field in [
+            "id",
+            "bbox",
+            "properties.datetime",
+            "properties.deprecated",
+            "properties.sat:orbit_state",
+            "assets.product",
+        ]:
+            self.assertIn(field, query["fields"]["include"])
+        self.assertEqual(["links"], query["fields"]["exclude"])
+
     def test_group_items(self):
         item0 = pystac.Item(
             id="S3A_SL_2_LST____20251121T072112_20251121T072412_20251121T094300_0180_133_049_2160_PS1_O_NR_004",
@@ -91,18 +113,43 @@ class Sentinel3Test(TestCase):
         )
 
         grouped_item = group_items([item0, item1, item2, item3, item4, item5, item6])
-        self.assertIsInstance(grouped_item, xr.DataArray)
-        self.assertEqual(dict(time=4), grouped_item.sizes)
-        self.assertIsInstance(grouped_item[0].item(), list)
-        self.assertEqual(2, len(grouped_item[0].item()))
+        self.assertIsInstance(grouped_item, list)
+        self.assertEqual(4, len(grouped_item))
+        dt, items = grouped_item[0]
+        self.assertEqual(np.datetime64("2024-06-04T09:30:31"), dt)
+        self.assertIsInstance(items, list)
+        self.assertEqual(2, len(items))
 
     def test_get_base_id(self):
+        item_id = (
+            "S3A_OL_1_EFR____20240604T093031_20240604T093331_20240605T102100_"
+            "0179_113_150_2160_PS1_O_NT_004"
+        )
+        self.assertEqual(
+            "S3A_OL_1_EFR____20240604T093031_20240604T093331", _get_base_id(item_id)
+        )
         item_id = "S3A_SL_2_LST____abc_abc_20251121T456789_0180_133_049_2160_PS1_O_NR_"
         with self.assertLogs("xcube.eopf", level="WARNING") as cm:
             item_id_return = _get_base_id(item_id)
         self.assertIn("does not contain 3 timestamp.", cm.output[-1])
         self.assertEqual(item_id, item_id_return)
 
+    def test_assert_same_spatial_coords(self):
+        def make_ds(lon, dt):
+            return xr.Dataset(
+                dict(var=(("lat", "lon"), np.zeros((2, len(lon))))),
+                coords=dict(lat=[1.0, 0.0], lon=lon, time=np.datetime64(dt)),
+            )
+
+        ds0 = make_ds([0.0, 1.0, 2.0], "2024-06-04")
+        ds1 = make_ds([0.0, 1.0, 2.0], "2024-06-05")
+        _assert_same_spatial_coords([ds0])
+        _assert_same_spatial_coords([ds0, ds1])
+        ds2 = make_ds([0.5, 1.5, 2.5], "2024-06-06")
+        with self.assertRaises(DataStoreError) as cm:
+            _assert_same_spatial_coords([ds0, ds1, ds2])
+        self.assertIn("'lon'", str(cm.exception))
+
 
 class TestIgnoreZeroSizedDimension(TestCase):
     def setUp(self):
@@ -110,14 +157,14 @@ class TestIgnoreZeroSizedDimension(TestCase):
         # Create a dummy LogRecord for testing
         self.logger_name = "xcube.resampling"
 
-    def make_record(self, msg):
+    def make_record(self, msg, args=()):
         return logging.LogRecord(
             name=self.logger_name,
             level=logging.WARNING,
             pathname="",
             lineno=0,
             msg=msg,
-            args=(),
+            args=args,
             exc_info=None,
         )
 
@@ -129,6 +176,14 @@ class TestIgnoreZeroSizedDimension(TestCase):
             self.filter.filter(record), "Filter should suppress the target message"
         )
 
+    def test_suppresses_formatted_target_message(self):
+        record = self.make_record(
+            "%s dataset contains at least one zero-sized dimension.", ("Clipped",)
+        )
+        self.assertFalse(
+            self.filter.filter(record), "Filter should suppress the target message"
+        )
+
     def test_allows_other_messages(self):
         record = self.make_record("Some other warning message")
         self.assertTrue(
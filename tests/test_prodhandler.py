@@ -9,6 +9,7 @@ import xarray as xr
 from xcube.util.jsonschema import JsonObjectSchema
 
 from xcube_eopf.prodhandler import ProductHandler, ProductHandlerRegistry
+from xcube_eopf.prodhandlers import register_product_handlers
 from xcube_eopf.prodhandlers.sentinel2 import (
     Sen2L1CProductHandler,
     Sen2L2AProductHandler,
@@ -53,6 +54,13 @@ class ProductHandlerTest(TestCase):
         self.assertIsInstance(ProductHandler.from_data_id("TEST"), TestProductHandler)
         self.assertIsNone(ProductHandler.from_data_id("REST"))
 
+    def test_register_product_handlers_idempotent(self):
+        register_product_handlers()
+        handler = ProductHandler.from_data_id("sentinel-2-l2a")
+        self.assertIsInstance(handler, Sen2L2AProductHandler)
+        register_product_handlers()
+        self.assertIs(handler, ProductHandler.from_data_id("sentinel-2-l2a"))
+
 
 class ProductHandlerRegistryTest(TestCase):
     # noinspection PyMethodMayBeStatic
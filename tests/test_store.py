@@ -12,15 +12,24 @@ from xcube.core.store import DataStoreError, new_data_store
 from xcube.util.jsonschema import JsonObjectSchema
 from xcube_resampling.utils import reproject_bbox
 
-from xcube_eopf.constants import CONVERSION_FACTOR_DEG_METER, DATA_STORE_ID
+from xcube_eopf.constants import (
+    CONVERSION_FACTOR_DEG_METER,
+    DATA_STORE_ID,
+    STAC_SEARCH_LIMIT,
+)
 
 from .helpers import sen2_l2a_10m, sen2_l2a_60m, sen2_l2a_60m_wo_scl, sen3_ol1efr_data
 
 
+def _sen3_ol1efr_data_chunked():
+    return sen3_ol1efr_data().chunk(lat=1024, lon=1024)
+
+
 class EOPFZarrDataStoreTest(TestCase):
 
-    def setUp(self):
-        self.store = new_data_store(DATA_STORE_ID)
+    @classmethod
+    def setUpClass(cls):
+        cls.store = new_data_store(DATA_STORE_ID)
 
     def test_get_data_store_params_schema(self):
         schema = self.store.get_data_store_params_schema()
@@ -138,22 +147,8 @@ class EOPFZarrDataStoreTest(TestCase):
         )
 
     @pytest.mark.vcr()
-    @patch("xarray.open_dataset")
-    def test_open_data_sen2_10m(self, mock_open_dataset):
-        ds_ok = sen2_l2a_10m()
-
-        # First call fails, second succeeds (adjust count if needed)
-        mock_open_dataset.side_effect = [
-            FileNotFoundError("missing file"),
-            ds_ok,
-            ds_ok,
-            ds_ok,
-            ds_ok,
-            ds_ok,
-            ds_ok,
-            ds_ok,
-        ]
-
+    @pytest.mark.mock_xarray_ret(factory=sen2_l2a_10m, num_missing=1)
+    def test_open_data_sen2_10m(self):
         ds = self.store.open_data(
             data_id="sentinel-2-l2a",
             bbox=(610000, 5880000, 630000, 5900000),
@@ -178,9 +173,8 @@ class EOPFZarrDataStoreTest(TestCase):
         self.assertIn("xcube_eopf_version", ds.attrs)
 
     @pytest.mark.vcr()
-    @patch("xarray.open_dataset")
-    def test_open_data_sen2_5m_interp_method(self, mock_xarray):
-        mock_xarray.return_value = sen2_l2a_10m()
+    @pytest.mark.mock_xarray_ret(factory=sen2_l2a_10m)
+    def test_open_data_sen2_5m_interp_method(self):
         ds = self.store.open_data(
             data_id="sentinel-2-l2a",
             bbox=(610000, 5880000, 630000, 5900000),
@@ -205,9 +199,8 @@ class EOPFZarrDataStoreTest(TestCase):
         self.assertIn("xcube_eopf_version", ds.attrs)
 
     @pytest.mark.vcr()
-    @patch("xarray.open_dataset")
-    def test_open_data_sen2_100m_agg_methods(self, mock_xarray):
-        mock_xarray.return_value = sen2_l2a_60m()
+    @pytest.mark.mock_xarray_ret(factory=sen2_l2a_60m)
+    def test_open_data_sen2_100m_agg_methods(self):
         ds = self.store.open_data(
             data_id="sentinel-2-l2a",
             bbox=(610000, 5880000, 630000, 5900000),
@@ -232,9 +225,8 @@ class EOPFZarrDataStoreTest(TestCase):
         self.assertIn("xcube_eopf_version", ds.attrs)
 
     @pytest.mark.vcr()
-    @patch("xarray.open_dataset")
-    def test_open_data_sen2_geographic(self, mock_xarray):
-        mock_xarray.return_value = sen2_l2a_60m_wo_scl()
+    @pytest.mark.mock_xarray_ret(factory=sen2_l2a_60m_wo_scl)
+    def test_open_data_sen2_geographic(self):
 
         # open Sentinel-2 L2A
         bbox = [610000, 5880000, 630000, 5900000]
@@ -266,9 +258,8 @@ class EOPFZarrDataStoreTest(TestCase):
         self.assertIn("xcube_eopf_version", ds.attrs)
 
     @pytest.mark.vcr()
-    @patch("xarray.open_dataset")
-    def test_open_data_sen2_native(self, mock_xarray):
-        mock_xarray.return_value = sen2_l2a_60m_wo_scl()
+    @pytest.mark.mock_xarray_ret(factory=sen2_l2a_60m_wo_scl)
+    def test_open_data_sen2_native(self):
 
         # open Sentinel-2 L2A
         ds = self.store.open_data(
@@ -310,21 +301,8 @@ class EOPFZarrDataStoreTest(TestCase):
         )
 
     @pytest.mark.vcr()
-    @patch("xarray.open_dataset")
-    def test_open_data_sen3_geographic(self, mock_open_dataset):
-        ds_ok = sen3_ol1efr_data()
-
-        # First call fails, second succeeds (adjust count if needed)
-        mock_open_dataset.side_effect = [
-            FileNotFoundError("missing file"),
-            ds_ok,
-            ds_ok,
-            ds_ok,
-            ds_ok,
-            ds_ok,
-            ds_ok,
-        ]
-
+    @pytest.mark.mock_xarray_ret(factory=_sen3_ol1efr_data_chunked, num_missing=1)
+    def test_open_data_sen3_geographic(self):
         # open Sentinel-3 OL1EFR
         ds = self.store.open_data(
             data_id="sentinel-3-olci-l1-efr",
@@ -362,7 +340,30 @@ class EOPFZarrDataStoreTest(TestCase):
                 crs="EPSG:32632",
                 variables=["b02", "b03", "b04", "scl"],
             )
-        self.assertIn("No items found for search_params", str(cm.exception))
+        self.assertEqual(
+            "No items found for collections ['sentinel-2-l2a'], "
+            "bbox (610000, 5880000, 630000, 5900000) and datetime "
+            "['2016-05-01', '2017-05-15'].",
+            str(cm.exception),
+        )
+
+    @patch("xcube_eopf.store.get_stac_client")
+    def test_open_data_search_params(self, mock_get_stac_client):
+        mock_search = mock_get_stac_client.return_value.search
+        mock_search.return_value.items.return_value = iter([])
+        with self.assertRaises(DataStoreError):
+            _ = self.store.open_data(
+                data_id="sentinel-2-l2a",
+                bbox=(610000, 5880000, 630000, 5900000),
+                time_range=["2016-05-01", "2017-05-15"],
+                spatial_res=10,
+                crs="EPSG:32632",
+            )
+        mock_search.assert_called_once()
+        search_params = mock_search.call_args.kwargs
+        self.assertEqual(STAC_SEARCH_LIMIT, search_params["limit"])
+        self.assertEqual(["sentinel-2-l2a"], search_params["collections"])
+        self.assertIn("fields", search_params)
 
     def test_describe_data(self):
         with self.assertRaises(NotImplementedError) as cm:
@@ -4,27 +4,65 @@
 
 import datetime
 import unittest
+from unittest.mock import patch
 
+import dask.array as da
 import numpy as np
 import pyproj
 import pystac
+import pytest
 import xarray as xr
 
 from xcube_eopf.utils import (
     add_nominal_datetime,
+    bbox_to_geojson,
+    convert_to_solar_time,
+    filter_items_deprecated,
+    filter_items_wrong_footprint,
+    get_stac_client,
     mosaic_spatial_take_first,
     normalize_crs,
+    open_products,
+    reproject_bbox,
 )
 
 
 class UtilsTest(unittest.TestCase):
 
+    @patch("pystac_client.Client.open")
+    def test_get_stac_client(self, mock_open):
+        get_stac_client.cache_clear()
+        try:
+            client = get_stac_client()
+            self.assertIs(client, get_stac_client())
+            mock_open.assert_called_once()
+        finally:
+            get_stac_client.cache_clear()
+
     def test_normalize_crs(self):
         crs_str = "EPSG:4326"
         crs_pyproj = pyproj.CRS.from_string(crs_str)
         self.assertEqual(crs_pyproj, normalize_crs(crs_str))
         self.assertEqual(crs_pyproj, normalize_crs(crs_pyproj))
 
+    def test_reproject_bbox(self):
+        bbox = [610000, 5880000, 630000, 5900000]
+        self.assertEqual(bbox, reproject_bbox(bbox, "EPSG:32632", "EPSG:32632"))
+        bbox_wgs84 = reproject_bbox(bbox, "EPSG:32632", "EPSG:4326")
+        np.testing.assert_allclose(
+            [10.6414, 53.0537, 10.9477, 53.2379], bbox_wgs84, atol=1e-4
+        )
+        # CRS given as pyproj.CRS objects
+        bbox_wgs84_crs = reproject_bbox(
+            bbox, pyproj.CRS.from_epsg(32632), pyproj.CRS.from_epsg(4326)
+        )
+        np.testing.assert_allclose(bbox_wgs84, bbox_wgs84_crs)
+        # bounding boxes between geographic CRSs are transformed without densification
+        np.testing.assert_allclose(
+            [10.0, 53.0, 11.0, 54.0],
+            reproject_bbox([10.0, 53.0, 11.0, 54.0], "OGC:CRS84", "EPSG:4326"),
+        )
+
     def test_add_nominal_datetime(self):
         item0 = pystac.Item(
             id="item0",
@@ -141,3 +179,109 @@ class UtilsTest(unittest.TestCase):
         ds_test = mosaic_spatial_take_first(list_ds)
         self.assertIsInstance(ds_test, xr.Dataset)
         xr.testing.assert_allclose(ds_test, ds_expected)
+
+    def test_mosaic_spatial_take_first_all_nan(self):
+        coords = {"lat": [10.0, 20.0], "lon": [100.0, 110.0]}
+        data0 = np.array([[np.nan, 2], [np.nan, np.nan]], dtype=np.float32)
+        data1 = np.array([[np.nan, 12], [13, np.nan]], dtype=np.float32)
+        list_ds = [
+            xr.Dataset({"B01": xr.DataArray(data, dims=("lat", "lon"), coords=coords)})
+            for data in (data0, data1)
+        ]
+        ds_test = mosaic_spatial_take_first(list_ds)
+        self.assertEqual(np.float32, ds_test["B01"].dtype)
+        np.testing.assert_equal(
+            np.array([[np.nan, 2], [13, np.nan]], dtype=np.float32),
+            ds_test["B01"].values,
+        )
+
+    @pytest.mark.mock_xarray_ret(factory=xr.Dataset, num_missing=1)
+    def test_open_products(self):
+        items = [
+            pystac.Item(
+                id=f"item{i}",
+                geometry=None,
+                bbox=None,
+                datetime=datetime.datetime(2024, 6, 4),
+                properties={},
+                assets={"product": pystac.Asset(f"https://test/item{i}.zarr")},
+            )
+            for i in range(3)
+        ]
+        with self.assertLogs("xcube.eopf", level="WARNING"):
+            list_ds = open_products(items)
+        self.assertEqual(3, len(list_ds))
+        self.assertEqual(1, sum(ds is None for ds in list_ds))
+        self.assertEqual([], open_products([]))
+
+    def test_bbox_to_geojson(self):
+        geojson = bbox_to_geojson([0.0, 50.0, 1.0, 51.0])
+        self.assertEqual("Polygon", geojson["type"])
+        self.assertEqual(
+            (((0.0, 50.0), (1.0, 50.0), (1.0, 51.0), (0.0, 51.0), (0.0, 50.0)),),
+            geojson["coordinates"],
+        )
+        # the returned dict is not shared between calls
+        geojson["type"] = "Point"
+        self.assertEqual("Polygon", bbox_to_geojson((0.0, 50.0, 1.0, 51.0))["type"])
+
+    def test_convert_to_solar_time(self):
+        utc = datetime.datetime(2024, 6, 4, 10, 30, 31)
+        self.assertEqual(
+            datetime.datetime(2024, 6, 4, 11, 30, 31), convert_to_solar_time(utc, 20.0)
+        )
+        utcs = np.array([utc, utc], dtype="datetime64[us]")
+        np.testing.assert_array_equal(
+            np.array(
+                ["2024-06-04T11:30:31", "2024-06-04T09:30:31"], dtype="datetime64[us]"
+            ),
+            convert_to_solar_time(utcs, np.array([20.0, -20.0])),
+        )
+
+    def test_filter_items(self):
+        items = [
+            pystac.Item(
+                id=f"item{i}",
+                geometry=None,
+                bbox=bbox,
+                datetime=datetime.datetime(2024, 6, 4),
+                properties=properties,
+            )
+            for i, (bbox, properties) in enumerate(
+                [
+                    ([0, 50, 1, 51], {}),
+                    ([-179, 50, 179, 51], {}),
+                    ([0, 50, 1, 51], {"deprecated": True}),
+                    ([0, 50, 1, 51], {"deprecated": False}),
+                ]
+            )
+        ]
+        self.assertEqual(
+            ["item0", "item1", "item3"],
+            [item.id for item in filter_items_deprecated(items)],
+        )
+        self.assertEqual(
+            ["item0", "item2", "item3"],
+            [item.id for item in filter_items_wrong_footprint(items)],
+        )
+        self.assertEqual([], filter_items_deprecated([]))
+        self.assertEqual([], filter_items_wrong_footprint([]))
+
+    def test_mosaic_spatial_take_first_chunks(self):
+        coords = dict(y=np.arange(4), x=np.arange(4))
+        ds0 = xr.Dataset(
+            dict(b01=(("y", "x"), da.full((4, 4), np.nan, chunks=2))), coords=coords
+        )
+        ds1 = xr.Dataset(
+            dict(b01=(("y", "x"), da.ones((4, 4), chunks=(3, 1)))), coords=coords
+        )
+        ds_test = mosaic_spatial_take_first([ds0, ds1])
+        self.assertEqual(((2, 2), (2, 2)), ds_test.b01.chunks)
+        np.testing.assert_equal(np.ones((4, 4)), ds_test.b01.values)
+        # more than two datasets are stacked
+        ds2 = xr.Dataset(
+            dict(b01=(("y", "x"), da.zeros((4, 4), chunks=(1, 4)))), coords=coords
+        )
+        ds_test = mosaic_spatial_take_first([ds0, ds1, ds2])
+        self.assertEqual(((2, 2), (2, 2)), ds_test.b01.chunks)
+        np.testing.assert_equal(np.ones((4, 4)), ds_test.b01.values)
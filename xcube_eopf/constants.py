@@ -20,6 +20,23 @@ DATA_STORE_ID = "eopf-zarr"
 STAC_URL = "https://stac.core.eopf.eodc.eu"
 STAC_COLLECTIONS_URL = "https://stac.browser.user.eopf.eodc.eu/collections"
 EOPF_ZARR_OPENR_ID = "dataset:zarr:eopf-zarr"
+# number of items requested per page of a STAC item search
+STAC_SEARCH_LIMIT = 500
+# maximum number of EOPF products opened concurrently
+MAX_OPEN_WORKERS = 16
+# item fields requested from the STAC API by all product handlers, see
+# https://github.com/stac-api-extensions/fields
+STAC_SEARCH_FIELDS = [
+    "type",
+    "stac_version",
+    "id",
+    "collection",
+    "bbox",
+    "geometry",
+    "properties.datetime",
+    "properties.deprecated",
+    "assets.product",
+]
 
 # other constants
 CONVERSION_FACTOR_DEG_METER = 111320
@@ -2,8 +2,14 @@
 #  Permissions are hereby granted under the terms of the Apache 2.0 License:
 #  https://opensource.org/license/apache-2-0.
 
+_REGISTERED = False
+
 
 def register_product_handlers():
+    global _REGISTERED
+    if _REGISTERED:
+        return
+
     from xcube_eopf.prodhandler import ProductHandler
 
     from .sentinel1 import register as register_s1
@@ -13,3 +19,4 @@ def register_product_handlers():
     register_s1(ProductHandler.registry)
     register_s2(ProductHandler.registry)
     register_s3(ProductHandler.registry)
+    _REGISTERED = True
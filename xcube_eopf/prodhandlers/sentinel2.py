@@ -2,12 +2,16 @@
 #  Permissions are hereby granted under the terms of the Apache 2.0 License:
 #  https://opensource.org/license/apache-2-0.
 
+import datetime
+import functools
 from abc import ABC
 from collections import defaultdict
 from collections.abc import Sequence
+from typing import NamedTuple
 
 import dask.array as da
 import numpy as np
+import pandas as pd
 import pyproj
 import pystac
 import xarray as xr
@@ -16,11 +20,9 @@ from xcube.core.store import DataStoreError
 from xcube.util.jsonschema import JsonObjectSchema, JsonStringSchema
 from xcube_resampling.gridmapping import GridMapping
 from xcube_resampling.spatial import resample_in_space
-from xcube_resampling.utils import reproject_bbox
 
 from xcube_eopf.constants import (
     DEFAULT_CRS,
-    LOG,
     SCHEMA_ADDITIONAL_QUERY,
     SCHEMA_AGG_METHODS,
     SCHEMA_BBOX,
@@ -29,6 +31,7 @@ from xcube_eopf.constants import (
     SCHEMA_TILE_SIZE,
     SCHEMA_TIME_RANGE,
     SCHEMA_VARIABLES,
+    STAC_SEARCH_FIELDS,
 )
 from xcube_eopf.prodhandler import ProductHandler, ProductHandlerRegistry
 from xcube_eopf.utils import (
@@ -37,6 +40,8 @@ from xcube_eopf.utils import (
     bbox_to_geojson,
     mosaic_spatial_take_first,
     normalize_crs,
+    open_products,
+    reproject_bbox,
 )
 
 _SEN2_SPATIAL_RES = np.array([10, 20, 60])
@@ -49,6 +54,45 @@ _ATTRIBUTE_KEYS = [
     "flag_colors",
     "grid_mapping",
 ]
+_STAC_SEARCH_FIELDS = dict(
+    include=STAC_SEARCH_FIELDS
+    + [
+        "properties.grid:code",
+        "properties.proj:code",
+        "properties.proj:bbox",
+        "assets.B02_10m",
+    ],
+    exclude=["links"],
+)
+
+
+class _ItemRecord(NamedTuple):
+    """STAC item together with the properties needed for grouping,
+    extracted once per item."""
+
+    item: pystac.Item
+    time: np.datetime64
+    date: datetime.date
+    tile_id: str
+    crs: str | None
+    bbox: list[float | int] | None
+
+
+class GroupedItems(NamedTuple):
+    """Sentinel-2 STAC items grouped by solar day and tile ID."""
+
+    times: np.ndarray
+    """The mean acquisition datetimes of the solar days, sorted ascending."""
+    tile_ids: np.ndarray
+    """The MGRS tile codes, sorted ascending."""
+    cells: dict[tuple[np.datetime64, str], list[pystac.Item]]
+    """The STAC items per (time, tile ID); only populated cells are included."""
+    tile_crss: dict[str, str]
+    """The CRS identifier (`proj:code`) per tile ID."""
+    tile_bboxes: dict[str, list[float | int] | None]
+    """The bounding box in the tile's UTM CRS (`proj:bbox`) per tile ID."""
+
+
 _SCHEMA_CRS_SEN2 = JsonStringSchema(
     title="Coordinate Reference System",
     description=(
@@ -93,6 +137,7 @@ class Sen2ProductHandler(ProductHandler, ABC):
             datetime=open_params["time_range"],
             intersects=bbox_to_geojson(bbox_wgs84),
             query=open_params.get("query"),
+            fields=_STAC_SEARCH_FIELDS,
         )
 
     def open_data(
@@ -105,7 +150,12 @@ class Sen2ProductHandler(ProductHandler, ABC):
         ds = generate_cube(grouped_items, **open_params)
 
         # add attributes
-        ds = add_attributes(data_id, ds, grouped_items, **open_params)
+        ds = add_attributes(
+            data_id,
+            ds,
+            ((dt, items) for (dt, _), items in grouped_items.cells.items()),
+            **open_params,
+        )
 
         # TODO how to handle solar and viewing angles
 
@@ -125,11 +175,11 @@ def register(registry: ProductHandlerRegistry):
     registry.register(Sen2L2AProductHandler)
 
 
-def group_items(items: list[pystac.Item]) -> xr.DataArray:
+def group_items(items: list[pystac.Item]) -> GroupedItems:
     """Group STAC items by solar day and tile ID.
 
-    Organizes a list of Sentinel-2 STAC items into an `xarray.DataArray` with
-    dimensions `(time, tile_id)`, where:
+    Organizes a list of Sentinel-2 STAC items into cells indexed by `(time, tile_id)`,
+    where:
     - `time` represents the solar acquisition date (date only, time of day is ignored).
     - `tile_id` corresponds to the Sentinel-2 MGRS tile code.
 
@@ -137,16 +187,20 @@ def group_items(items: list[pystac.Item]) -> xr.DataArray:
         items: A list of STAC items. Each item must include:
             - `properties["datetime_nominal"]`: The nominal acquisition datetime.
             - `properties["grid:code"]`: The MGRS tile code.
+            - `properties["proj:code"]`: The CRS identifier of the tile.
 
     Returns:
-        A 2D `xarray.DataArray` of shape (time, tile_id), where each cell contains a
-        list of STAC items for the given date and tile ID. The `time` coordinate is
-        derived from the nominal acquisition datetime of the first item in each
-        (date, tile) group.
+        The grouped items, where each populated cell contains a list of STAC items
+        for the given date and tile ID. The times are derived from the mean
+        acquisition datetime of all items of the same date.
 
     Notes:
-        - Each cell in the returned array contains a list of items because tiles may
-          be split across multiple files.
+        - Each cell contains a list of items because tiles may be split across
+          multiple files.
+        - The cells are ordered by time and tile ID.
+
+    Raises:
+        DataStoreError: If an item has no `proj:code` property.
     """
     items = add_nominal_datetime(items)
 
@@ -155,61 +209,135 @@ def group_items(items: list[pystac.Item]) -> xr.DataArray:
     #       mosaicked by taking the fist non-NaN value.
     #       For proper handling wait for STAC item update (see https://github.com/EOPF-Sample-Service/eopf-stac/issues/28)
 
-    # get dates and tile IDs of the items
-    dates = []
-    tile_ids = []
-    for item in items:
-        dates.append(item.properties["datetime_nominal"].date())
-        tile_ids.append(item.properties["grid:code"])
-    dates = np.unique(dates)
-    tile_ids = np.unique(tile_ids)
-
-    # sort items by date and tile ID into a data array
-    grouped_items = np.full((len(dates), len(tile_ids)), None, dtype=object)
-    for item in items:
-        date = item.properties["datetime_nominal"].date()
-        tile_id = item.properties["grid:code"]
-        idx_date = np.where(dates == date)[0][0]
-        idx_tile_id = np.where(tile_ids == tile_id)[0][0]
-        if grouped_items[idx_date, idx_tile_id] is None:
-            grouped_items[idx_date, idx_tile_id] = [item]
-        else:
-            grouped_items[idx_date, idx_tile_id].append(item)
-    for idx_date in range(grouped_items.shape[0]):
-        for idx_tile_id in range(grouped_items.shape[1]):
-            if grouped_items[idx_date, idx_tile_id] is None:
-                grouped_items[idx_date, idx_tile_id] = []
-    grouped_items = xr.DataArray(
-        grouped_items,
-        dims=("time", "tile_id"),
-        coords=dict(time=dates, tile_id=tile_ids),
-    )
+    # read the item properties only once
+    records = [_get_item_record(item) for item in items]
+    missing_crs = [rec.item.id for rec in records if rec.crs is None]
+    if missing_crs:
+        raise DataStoreError(
+            "Required metadata field proj:code not found in STAC items "
+            f"{', '.join(missing_crs)}."
+        )
 
-    # replace date by datetime from first item
+    # get sorted unique dates and tile IDs using hash-based deduplication,
+    # and the indices of each item into these arrays
+    item_dates = np.array([rec.date for rec in records], dtype=object)
+    item_tile_ids = np.array([rec.tile_id for rec in records], dtype=object)
+    dates = np.sort(pd.unique(item_dates))
+    tile_ids = np.sort(pd.unique(item_tile_ids))
+    idx_dates = np.searchsorted(dates, item_dates)
+    idx_tile_ids = np.searchsorted(tile_ids, item_tile_ids)
+
+    # sort items by date and tile ID in a single pass; only populated cells are
+    # stored, since most (date, tile) combinations are usually empty
+    cells = {}
+    times_per_date = [[] for _ in range(len(dates))]
+    # the CRS and bounding box of a tile are taken from its first item
+    tile_crss = {}
+    tile_bboxes = {}
+    for rec, (idx_date, idx_tile_id) in zip(records, zip(idx_dates, idx_tile_ids)):
+        cells.setdefault((idx_date, idx_tile_id), []).append(rec)
+        times_per_date[idx_date].append(rec.time)
+        tile_crss.setdefault(rec.tile_id, rec.crs)
+        tile_bboxes.setdefault(rec.tile_id, rec.bbox)
+
+    # replace date by mean datetime of all items of the same date
     dts = np.empty(len(dates), dtype="datetime64[s]")
-    for i, date in enumerate(grouped_items.time.values):
-        items = np.sum(grouped_items.sel(time=date).values)
-        times = np.array(
-            [np.datetime64(item.datetime.replace(tzinfo=None)) for item in items]
-        )
+    for idx_date, times in enumerate(times_per_date):
+        times = np.array(times)
         mean_time = np.datetime64(int(times.view("int64").mean()), "us")
-        dts[i] = mean_time.astype("datetime64[s]")
-    grouped_items = grouped_items.assign_coords(time=dts)
-    grouped_items["time"].encoding["units"] = "seconds since 1970-01-01"
-    grouped_items["time"].encoding["calendar"] = "standard"
+        dts[idx_date] = mean_time.astype("datetime64[s]")
+
+    return GroupedItems(
+        times=dts,
+        tile_ids=tile_ids,
+        cells={
+            (dts[idx_date], tile_ids[idx_tile_id]): [rec.item for rec in recs]
+            for (idx_date, idx_tile_id), recs in sorted(cells.items())
+        },
+        tile_crss=tile_crss,
+        tile_bboxes=tile_bboxes,
+    )
+
 
-    return grouped_items
+def _get_item_record(item: pystac.Item) -> _ItemRecord:
+    """Extract the properties of a Sentinel-2 STAC item needed for grouping.
 
+    Args:
+        item: A Sentinel-2 STAC item with the property `"datetime_nominal"`.
 
-def generate_cube(grouped_items: xr.DataArray, **open_params) -> xr.Dataset:
+    Returns:
+        The item record.
+    """
+    return _ItemRecord(
+        item=item,
+        time=np.datetime64(item.datetime.replace(tzinfo=None), "us"),
+        date=item.properties["datetime_nominal"].date(),
+        tile_id=item.properties["grid:code"],
+        crs=item.properties.get("proj:code"),
+        bbox=_get_utm_bbox(item),
+    )
+
+
+def _get_utm_bbox(item: pystac.Item) -> list[float | int] | None:
+    """Get the bounding box of a Sentinel-2 STAC item in its UTM CRS.
+
+    The bounding box is taken from the metadata of the asset `"B02_10m"`,
+    and from the item properties as a fallback (latest eopf-stac).
+
+    Args:
+        item: A Sentinel-2 STAC item.
+
+    Returns:
+        The bounding box (minx, miny, maxx, maxy), or None if not available.
+    """
+    asset = item.assets.get("B02_10m")
+    bbox = asset.extra_fields.get("proj:bbox") if asset is not None else None
+    return item.properties.get("proj:bbox") if bbox is None else bbox
+
+
+def _select_tiles(grouped_items: GroupedItems, tile_ids: list[str]) -> GroupedItems:
+    """Select the cells of the given tiles, keeping all times.
+
+    Args:
+        grouped_items: The STAC items grouped by time and tile ID.
+        tile_ids: The tile IDs to be selected.
+
+    Returns:
+        The grouped items restricted to the given tile IDs.
+    """
+    tile_ids = set(tile_ids)
+    return GroupedItems(
+        times=grouped_items.times,
+        tile_ids=np.array(
+            [tile_id for tile_id in grouped_items.tile_ids if tile_id in tile_ids],
+            dtype=object,
+        ),
+        cells={
+            key: items
+            for key, items in grouped_items.cells.items()
+            if key[1] in tile_ids
+        },
+        tile_crss={
+            tile_id: crs
+            for tile_id, crs in grouped_items.tile_crss.items()
+            if tile_id in tile_ids
+        },
+        tile_bboxes={
+            tile_id: bbox
+            for tile_id, bbox in grouped_items.tile_bboxes.items()
+            if tile_id in tile_ids
+        },
+    )
+
+
+def generate_cube(grouped_items: GroupedItems, **open_params) -> xr.Dataset:
     """Generate a spatiotemporal data cube from grouped STAC items.
 
     This function takes grouped STAC items and generates a unified xarray
     dataset, mosaicking and stacking the data across spatial tiles and time.
 
     Args:
-        grouped_items: A 2D data array indexed by time and tile_id, where each element
-            contains a list of STAC items for the given date and tile ID.
+        grouped_items: The STAC items grouped by time and tile ID.
         **open_params: Optional keyword arguments for data opening and processing:
             - bbox (list): Bounding box used for spatial subsetting.
             - crs (str): Coordinate reference system of the bounding box.
@@ -221,10 +349,8 @@ def generate_cube(grouped_items: xr.DataArray, **open_params) -> xr.Dataset:
     """
     # Group the tile IDs by UTM zones
     utm_tile_id = defaultdict(list)
-    for tile_id in grouped_items.tile_id.values:
-        item = np.sum(grouped_items.sel(tile_id=tile_id).values)[0]
-        crs = item.properties["proj:code"]
-        utm_tile_id[crs].append(tile_id)
+    for tile_id in grouped_items.tile_ids:
+        utm_tile_id[grouped_items.tile_crss[tile_id]].append(tile_id)
     if open_params.get("crs") == "native":
         if len(utm_tile_id) > 1:
             raise DataStoreError(
@@ -241,7 +367,9 @@ def generate_cube(grouped_items: xr.DataArray, **open_params) -> xr.Dataset:
     # Insert the tile data per UTM zone
     list_ds_utm = []
     for crs, tile_ids in utm_tile_id.items():
-        ds = _generate_utm_cube(grouped_items.sel(tile_id=tile_ids), crs, **open_params)
+        ds = _generate_utm_cube(
+            _select_tiles(grouped_items, tile_ids), crs, **open_params
+        )
         list_ds_utm.append(ds)
 
     # Reproject datasets from different UTM zones to a common grid reference system
@@ -252,7 +380,7 @@ def generate_cube(grouped_items: xr.DataArray, **open_params) -> xr.Dataset:
 
 
 def _generate_utm_cube(
-    grouped_items: xr.DataArray,
+    grouped_items: GroupedItems,
     crs_utm: str,
     **open_params,
 ) -> xr.Dataset:
@@ -265,8 +393,7 @@ def _generate_utm_cube(
     that UTM zone.
 
     Args:
-        grouped_items: A 2D data array indexed by time and tile_id, where each element
-            contains a list of STAC items for the given date and tile ID.
+        grouped_items: The STAC items grouped by time and tile ID.
         crs_utm: The target UTM coordinate reference system identifier.
         **open_params: Additional parameters to control data opening and processing,
             including 'bbox' (bounding box) and 'crs' (coordinate reference system).
@@ -286,70 +413,84 @@ def _generate_utm_cube(
         variables=open_params.get("variables"),
     )
 
-    final_ds = None
-    for dt_idx, dt in enumerate(grouped_items.time.values):
-        for tile_id in grouped_items.tile_id.values:
-            items = grouped_items.sel(tile_id=tile_id, time=dt).item()
-            multi_tiles = []
-            for item in items:
-                try:
-                    ds = xr.open_dataset(
-                        item.assets["product"].href,
-                        engine="eopf-zarr",
-                        chunks={},
-                        **xarray_open_params,
-                    )
-                except FileNotFoundError:
-                    LOG.warning(
-                        "File not found for STAC item %s (href=%s)",
-                        item.id,
-                        item.assets["product"].href,
-                    )
-                    continue
-                ds = ds.sel(
-                    x=slice(final_bbox[0], final_bbox[2]),
-                    y=slice(final_bbox[3], final_bbox[1]),
-                )
-                if any(size == 0 for size in ds.sizes.values()):
-                    continue
-                multi_tiles.append(ds)
-            if not multi_tiles:
+    time_indices = {dt: dt_idx for dt_idx, dt in enumerate(grouped_items.times)}
+    tasks = [
+        (time_indices[dt], items) for (dt, _), items in grouped_items.cells.items()
+    ]
+    all_items = [item for _, items in tasks for item in items]
+    opened = iter(open_products(all_items, **xarray_open_params))
+
+    mosaics = []
+    for dt_idx, items in tasks:
+        multi_tiles = []
+        for _ in items:
+            ds = next(opened)
+            if ds is None:
+                continue
+            ds = ds.sel(
+                x=slice(final_bbox[0], final_bbox[2]),
+                y=slice(final_bbox[3], final_bbox[1]),
+            )
+            if any(size == 0 for size in ds.sizes.values()):
                 continue
-            mosaicked_ds = mosaic_spatial_take_first(multi_tiles)
-            if final_ds is None:
-                final_ds = _create_empty_dataset(
-                    mosaicked_ds, grouped_items, items_bbox, final_bbox, spatial_res
-                )
-            final_ds = _insert_tile_data(final_ds, mosaicked_ds, dt_idx)
+            multi_tiles.append(ds)
+        if not multi_tiles:
+            continue
+        mosaics.append((dt_idx, mosaic_spatial_take_first(multi_tiles)))
+    if not mosaics:
+        return None
 
-    return final_ds
+    return _create_utm_cube(mosaics, grouped_items, items_bbox, final_bbox, spatial_res)
 
 
-def _insert_tile_data(final_ds: xr.Dataset, ds: xr.Dataset, dt_idx: int) -> xr.Dataset:
-    """Insert spatial data from a smaller dataset into a larger asset dataset at
-    the correct spatiotemporal indices.
+def _insert_tile_data(
+    plane: da.Array,
+    tile: xr.DataArray,
+    x0: float,
+    y0: float,
+    spatial_res: int | float,
+) -> da.Array:
+    """Insert the data of a tile into a 2D plane of the final data cube at
+    the correct spatial indices.
 
-    This method locates the spatial coordinates of the input dataset `ds` within
-    the larger `final_ds` along the 'x' and 'y' dimensions, then inserts the data
-    from `ds` into the corresponding slice of `final_ds` for the specified time
-    index `dt_idx`.
+    The pixel offsets of the tile within the plane are computed from the
+    coordinates of its first pixel, since both share the same regular grid.
 
     Args:
-        final_ds: The larger dataset representing the final data cube for one UTM zone.
-        ds: The smaller xarray Dataset containing data to be inserted.
-        dt_idx: The time index in `final_ds` at which to insert the data.
+        plane: The 2D array (y, x) of a single time step of the final data cube.
+        tile: The 2D data array (y, x) to be inserted.
+        x0: The x-coordinate of the first pixel of the plane.
+        y0: The y-coordinate of the first pixel of the plane.
+        spatial_res: The spatial resolution of both arrays in CRS units.
 
     Returns:
-        The updated `final_ds` with data from `ds` inserted at the appropriate
+        The updated `plane` with the tile data inserted at the appropriate
         spatial location.
+
+    Raises:
+        DataStoreError: If the tile is not aligned with the pixel grid of
+            the plane or does not fit into the plane.
     """
-    xmin = final_ds.indexes["x"].get_loc(ds.x[0].item())
-    xmax = final_ds.indexes["x"].get_loc(ds.x[-1].item())
-    ymin = final_ds.indexes["y"].get_loc(ds.y[0].item())
-    ymax = final_ds.indexes["y"].get_loc(ds.y[-1].item())
-    for var in ds.data_vars:
-        final_ds[var][dt_idx, ymin : ymax + 1, xmin : xmax + 1] = ds[var]
-    return final_ds
+    xoff = (tile.x.values[0] - x0) / spatial_res
+    yoff = (y0 - tile.y.values[0]) / spatial_res
+    # rounding a misaligned tile would silently shift it by a fraction of a pixel
+    if abs(xoff - round(xoff)) > 1e-3 or abs(yoff - round(yoff)) > 1e-3:
+        raise DataStoreError(
+            f"Tile with pixel offset x={xoff}, y={yoff} is not aligned with "
+            f"the target grid of spatial resolution {spatial_res}."
+        )
+    xmin = int(round(xoff))
+    ymin = int(round(yoff))
+    xmax = xmin + tile.sizes["x"]
+    ymax = ymin + tile.sizes["y"]
+    # negative or oversized offsets would silently wrap around or be truncated
+    if xmin < 0 or ymin < 0 or ymax > plane.shape[-2] or xmax > plane.shape[-1]:
+        raise DataStoreError(
+            f"Tile with pixel extent x=[{xmin}, {xmax}), y=[{ymin}, {ymax}) "
+            f"does not fit into the target grid of shape {plane.shape[-2:]}."
+        )
+    plane[ymin:ymax, xmin:xmax] = tile.data
+    return plane
 
 
 def _merge_utm_zones(list_ds_utm: list[xr.Dataset], **open_params) -> xr.Dataset:
@@ -378,21 +519,33 @@ def _merge_utm_zones(list_ds_utm: list[xr.Dataset], **open_params) -> xr.Dataset
           its grid mapping is reused unless resolution mismatches are found.
         - Overlapping regions are resolved by selecting the first non-NaN value.
     """
-    # get correct target gridmapping
-    crss = [pyproj.CRS.from_cf(ds["spatial_ref"].attrs) for ds in list_ds_utm]
+    spatial_res = open_params["spatial_res"]
+    if not isinstance(spatial_res, tuple):
+        spatial_res = (spatial_res, spatial_res)
+    # compare the WKT strings first; parse and compare the CRSs only on mismatch
     target_crs = open_params["crs"]
-    crss_equal = [target_crs == crs for crs in crss]
+    target_wkt = target_crs.to_wkt()
+    crss_equal = [
+        ds["spatial_ref"].attrs.get("crs_wkt") == target_wkt
+        or _get_crs(ds["spatial_ref"].attrs) == target_crs
+        for ds in list_ds_utm
+    ]
+
+    # a single UTM zone already on the target grid needs neither
+    # resampling nor mosaicking
+    if (
+        len(list_ds_utm) == 1
+        and crss_equal[0]
+        and _has_spatial_res(list_ds_utm[0], spatial_res)
+    ):
+        return list_ds_utm[0]
+
+    # get correct target gridmapping
     if any(crss_equal):
         true_index = crss_equal.index(True)
         ds = list_ds_utm[true_index]
         target_gm = GridMapping.from_dataset(ds)
-        spatial_res = open_params["spatial_res"]
-        if not isinstance(spatial_res, tuple):
-            spatial_res = (spatial_res, spatial_res)
-        if (
-            ds.x[1] - ds.x[0] != spatial_res[0]
-            or abs(ds.y[1] - ds.y[0]) != spatial_res[1]
-        ):
+        if not _has_spatial_res(ds, spatial_res):
             target_gm = GridMapping.regular_from_bbox(
                 open_params["bbox"],
                 open_params["spatial_res"],
@@ -413,6 +566,36 @@ def _merge_utm_zones(list_ds_utm: list[xr.Dataset], **open_params) -> xr.Dataset
     return mosaic_spatial_take_first(resampled_list_ds)
 
 
+def _has_spatial_res(ds: xr.Dataset, spatial_res: tuple[float, float]) -> bool:
+    """Check whether the dataset has the given spatial resolution (x_res, y_res)."""
+    x_res = ds.x.values[1] - ds.x.values[0]
+    y_res = abs(ds.y.values[1] - ds.y.values[0])
+    return bool(x_res == spatial_res[0] and y_res == spatial_res[1])
+
+
+def _get_crs(crs_attrs: dict) -> pyproj.CRS:
+    """Get the CRS from the CF attributes of a grid mapping variable.
+
+    CRS objects are cached by their WKT representation, since all tiles of a
+    UTM zone carry the same grid mapping.
+
+    Args:
+        crs_attrs: The CF grid mapping attributes, e.g. of `spatial_ref`.
+
+    Returns:
+        The coordinate reference system.
+    """
+    crs_wkt = crs_attrs.get("crs_wkt")
+    if crs_wkt is None:
+        return pyproj.CRS.from_cf(crs_attrs)
+    return _get_crs_from_wkt(crs_wkt)
+
+
+@functools.lru_cache(maxsize=64)
+def _get_crs_from_wkt(crs_wkt: str) -> pyproj.CRS:
+    return pyproj.CRS.from_wkt(crs_wkt)
+
+
 def _resample_dataset_soft(
     ds: xr.Dataset, target_gm: GridMapping, **open_params
 ) -> xr.Dataset:
@@ -443,74 +626,81 @@ def _resample_dataset_soft(
     return ds
 
 
-def _get_bounding_box(grouped_items: xr.DataArray) -> list[float | int]:
+def _get_bounding_box(grouped_items: GroupedItems) -> list[float | int]:
     """Compute the overall bounding box that covers all tiles for the given grouped
      STAC items.
 
-    Iterates through each tile ID in `grouped_items` to extract the bounding box
-    from its STAC item and calculates the minimum bounding rectangle encompassing all
+    Takes the bounding box of each tile ID in `grouped_items`, as read from its
+    STAC items, and calculates the minimum bounding rectangle encompassing all
     tiles.
 
     Parameters:
-        grouped_items: A 2D data array indexed by time and tile_id, where each element
-            contains a list of STAC items for the given date and tile ID.
+        grouped_items: The STAC items grouped by time and tile ID.
 
     Returns:
         A list with four elements [xmin, ymin, xmax, ymax] representing the
         bounding box that encloses all tiles.
     """
-    xmin, ymin, xmax, ymax = np.inf, np.inf, -np.inf, -np.inf
-    for tile_id in grouped_items.tile_id.values:
-        item = np.sum(grouped_items.sel(tile_id=tile_id).values)[0]
-        # Take the bbox in UTM from the Item properties as default (latest eopf-stac)
-        bbox = item.assets["B02_10m"].extra_fields.get(
-            "proj:bbox", item.properties.get("proj:bbox")
+    bboxes = [grouped_items.tile_bboxes[tile_id] for tile_id in grouped_items.tile_ids]
+    if any(bbox is None for bbox in bboxes):
+        raise Exception(
+            "Required metadata field proj:bbox not found under Item nor Asset metadata."
         )
-        if bbox is None:
-            raise Exception(
-                "Required metadata field proj:bbox not found under "
-                "Item nor Asset metadata."
-            )
-        if xmin > bbox[0]:
-            xmin = bbox[0]
-        if ymin > bbox[1]:
-            ymin = bbox[1]
-        if xmax < bbox[2]:
-            xmax = bbox[2]
-        if ymax < bbox[3]:
-            ymax = bbox[3]
-    return [xmin, ymin, xmax, ymax]
-
-
-def _create_empty_dataset(
-    sample_ds: xr.Dataset,
-    grouped_items: xr.DataArray,
+    bboxes = np.array(bboxes)
+    return [
+        bboxes[:, 0].min().item(),
+        bboxes[:, 1].min().item(),
+        bboxes[:, 2].max().item(),
+        bboxes[:, 3].max().item(),
+    ]
+
+
+def _get_native_chunk_size(spatial_res: int) -> int:
+    """Get the chunk size of the Sentinel-2 products at a native resolution.
+
+    The products are chunked into blocks of equal ground extent for all
+    native resolutions, i.e. 1830 pixels at 10m, 915 pixels at 20m, and
+    305 pixels at 60m.
+
+    Args:
+        spatial_res: The native spatial resolution in meters (10, 20, or 60).
+
+    Returns:
+        The chunk size in pixels.
+    """
+    return int(_TILE_SIZE * _SEN2_SPATIAL_RES[0] // spatial_res)
+
+
+def _create_utm_cube(
+    mosaics: list[tuple[int, xr.Dataset]],
+    grouped_items: GroupedItems,
     items_bbox: Sequence[float | int],
     final_bbox: Sequence[float | int],
     spatial_res: int | float,
 ) -> xr.Dataset:
-    """Create an empty xarray Dataset with spatial and temporal dimensions matching
-    the given bounding boxes and grouped items.
-
-    The dataset is constructed using the data variables and types from `sample_ds`,
-    creating arrays filled with NaNs. It conforms to the native pixel grid and spatial
-    resolution of the Sentinel-2 product, while covering the spatial extent defined
-    by the input bounding boxes. The temporal dimension and coordinate values are
-    derived from `grouped_items`. The resulting dataset includes coordinates for
-    time, y, and x dimensions, along with a matching spatial reference coordinate
-    system.
+    """Assemble the data cube of one UTM zone from mosaicked tiles.
+
+    The data cube conforms to the native pixel grid and spatial resolution of
+    the Sentinel-2 product, while covering the spatial extent defined by the
+    input bounding boxes. The temporal dimension and coordinate values are
+    derived from `grouped_items`. The spatial chunk size matches the native
+    chunking of the products at the given resolution. Each time step is
+    assembled separately as a 2D array filled with NaNs, into which the
+    mosaicked tiles are inserted, so that every insertion only touches the
+    chunks of a single time step. The time steps are then stacked to the final
+    data cube.
 
     Args:
-        sample_ds: A sample dataset whose data variable names and dtypes will be used.
-        grouped_items: A 2D DataArray (time, tile_id) containing grouped STAC items.
+        mosaics: A list of tuples (time index, mosaicked dataset); the first
+            dataset defines the data variables, their dtypes and attributes.
+        grouped_items: The STAC items grouped by time and tile ID.
         items_bbox: The bounding box covering all input items (minx, miny, maxx, maxy).
         final_bbox: The target bounding box to define the spatial extent of the final
             datacube (minx, miny, maxx, maxy).
         spatial_res: The spatial resolution in CRS units (e.g., meters or degrees).
 
     Returns:
-        A dataset with shape (time, y, x), filled with NaNs and ready to be populated
-        with mosaicked data.
+        A dataset with shape (time, y, x) containing the mosaicked data.
     """
     half_res = spatial_res / 2
     y_start = items_bbox[3] - spatial_res * (
@@ -519,37 +709,47 @@ def _create_empty_dataset(
     y_end = items_bbox[1] + spatial_res * (
         (final_bbox[1] - items_bbox[1]) // spatial_res
     )
-    y = np.arange(y_start - half_res, y_end, -spatial_res)
+    num_y = int(round((y_start - y_end) / spatial_res))
     x_end = items_bbox[2] - spatial_res * (
         (items_bbox[2] - final_bbox[2]) // spatial_res
     )
     x_start = items_bbox[0] + spatial_res * (
         (final_bbox[0] - items_bbox[0]) // spatial_res
     )
-    x = np.arange(x_start + half_res, x_end, spatial_res)
-
-    chunks = (1, _TILE_SIZE, _TILE_SIZE)
-    shape = (grouped_items.sizes["time"], len(y), len(x))
-    ds = xr.Dataset(
-        {
-            key: (
-                ("time", "y", "x"),
-                da.full(shape, np.nan, dtype=var.dtype, chunks=chunks),
+    num_x = int(round((x_end - x_start) / spatial_res))
+    # compute pixel centers from integer pixel indices to avoid the accumulated
+    # floating point error of np.arange with a float step
+    y = y_start - half_res - spatial_res * np.arange(num_y)
+    x = x_start + half_res + spatial_res * np.arange(num_x)
+
+    mosaics_per_time = defaultdict(list)
+    for dt_idx, ds in mosaics:
+        mosaics_per_time[dt_idx].append(ds)
+    sample_ds = mosaics[0][1]
+    chunk_size = _get_native_chunk_size(spatial_res)
+    data_vars = {}
+    for key, var in sample_ds.data_vars.items():
+        planes = []
+        for dt_idx in range(len(grouped_items.times)):
+            plane = da.full(
+                (len(y), len(x)), np.nan, dtype=var.dtype, chunks=chunk_size
             )
-            for (key, var) in sample_ds.data_vars.items()
-        },
+            for ds in mosaics_per_time[dt_idx]:
+                plane = _insert_tile_data(plane, ds[key], x[0], y[0], spatial_res)
+            planes.append(plane)
+        attrs = {k: var.attrs[k] for k in _ATTRIBUTE_KEYS if k in var.attrs}
+        data_vars[key] = (("time", "y", "x"), da.stack(planes), attrs)
+
+    return xr.Dataset(
+        data_vars,
         coords={
             "x": x,
             "y": y,
-            "time": grouped_items.time,
+            "time": xr.Variable(
+                "time",
+                grouped_items.times,
+                encoding=dict(units="seconds since 1970-01-01", calendar="standard"),
+            ),
             "spatial_ref": sample_ds.spatial_ref,
         },
     )
-    for key in sample_ds.data_vars:
-        ds[key].attrs = {
-            k: sample_ds[key].attrs[k]
-            for k in _ATTRIBUTE_KEYS
-            if k in sample_ds[key].attrs
-        }
-
-    return ds
@@ -2,8 +2,8 @@
 #  Permissions are hereby granted under the terms of the Apache 2.0 License:
 #  https://opensource.org/license/apache-2-0.
 
+import functools
 import logging
-import re
 import warnings
 from abc import ABC
 from collections import defaultdict
@@ -11,8 +11,8 @@ from collections import defaultdict
 import numpy as np
 import pystac
 import xarray as xr
+from xcube.core.store import DataStoreError
 from xcube.util.jsonschema import JsonObjectSchema
-from xcube_resampling.utils import reproject_bbox
 
 from xcube_eopf.constants import (
     DEFAULT_CRS,
@@ -26,6 +26,7 @@ from xcube_eopf.constants import (
     SCHEMA_TILE_SIZE,
     SCHEMA_TIME_RANGE,
     SCHEMA_VARIABLES,
+    STAC_SEARCH_FIELDS,
 )
 from xcube_eopf.prodhandler import ProductHandler, ProductHandlerRegistry
 from xcube_eopf.utils import (
@@ -33,16 +34,30 @@ from xcube_eopf.utils import (
     add_nominal_datetime,
     bbox_to_geojson,
     mosaic_spatial_take_first,
+    open_products,
+    reproject_bbox,
 )
 
 _TILE_SIZE = 1024  # native chunk size of EOPF Sen3 Zarr samples
+_STAC_SEARCH_FIELDS = dict(
+    include=STAC_SEARCH_FIELDS + ["properties.sat:orbit_state"],
+    exclude=["links"],
+)
 
 
 class IgnoreZeroSizedDimension(logging.Filter):
+    _NEEDLES = ("Clipped dataset contains at least one zero-sized",)
+
     def filter(self, record):
-        # Return False to ignore this log record
-        if "Clipped dataset contains at least one zero-sized" in record.getMessage():
+        # Return False to ignore this log record. The raw message is checked
+        # first; it is only formatted if it has arguments.
+        msg = record.msg if isinstance(record.msg, str) else str(record.msg)
+        if any(needle in msg for needle in self._NEEDLES):
             return False
+        if record.args:
+            msg = record.getMessage()
+            if any(needle in msg for needle in self._NEEDLES):
+                return False
         return True
 
 
@@ -81,6 +96,7 @@ class Sen3ProductHandler(ProductHandler, ABC):
             datetime=open_params["time_range"],
             intersects=bbox_to_geojson(bbox_wgs84),
             query=open_params.get("query"),
+            fields=_STAC_SEARCH_FIELDS,
         )
 
     def open_data(
@@ -100,7 +116,11 @@ class Sen3ProductHandler(ProductHandler, ABC):
 
         return ds
 
-    def generate_cube(self, grouped_items: xr.DataArray, **open_params) -> xr.Dataset:
+    def generate_cube(
+        self,
+        grouped_items: list[tuple[np.datetime64, list[pystac.Item]]],
+        **open_params,
+    ) -> xr.Dataset:
         warnings.filterwarnings(
             "ignore", message="Clipping with the specified bounding box*"
         )
@@ -113,30 +133,28 @@ class Sen3ProductHandler(ProductHandler, ABC):
             variables=open_params.get("variables"),
         )
         dss_time = []
-        for dt_idx, dt in enumerate(grouped_items.time.values):
-            items = grouped_items.sel(time=dt).item()
+        all_items = [item for _, items in grouped_items for item in items]
+        opened = iter(open_products(all_items, **xarray_open_params))
+        for dt, items in grouped_items:
             dss_spatial = []
-            for item in items:
-                try:
-                    ds = xr.open_dataset(
-                        item.assets["product"].href,
-                        engine="eopf-zarr",
-                        chunks={},
-                        **xarray_open_params,
-                    )
-                except FileNotFoundError:
-                    LOG.warning(
-                        "File not found for STAC item %s (href=%s)",
-                        item.id,
-                        item.assets["product"].href,
-                    )
+            for _ in items:
+                ds = next(opened)
+                if ds is None:
                     continue
                 if any(size <= 1 for size in ds.sizes.values()):
                     continue
                 dss_spatial.append(ds)
-            dss_time.append(mosaic_spatial_take_first(dss_spatial))
-        ds_final = xr.concat(dss_time, dim="time", join="exact")
-        ds_final = ds_final.assign_coords(dict(time=grouped_items.time))
+            ds_mosaic = mosaic_spatial_take_first(dss_spatial)
+            dss_time.append(ds_mosaic.assign_coords(time=dt))
+        # all time steps are opened on the same target grid, hence the
+        # spatial coordinates need no alignment once they are checked
+        _assert_same_spatial_coords(dss_time)
+        ds_final = xr.combine_nested(
+            dss_time, concat_dim="time", join="override", combine_attrs="override"
+        )
+        ds_final["time"].encoding.update(
+            units="seconds since 1970-01-01", calendar="standard"
+        )
         return ds_final
 
 
@@ -177,40 +195,35 @@ def register(registry: ProductHandlerRegistry):
     registry.register(Sen3Sl2LstProductHandler)
 
 
-def group_items(items: list[pystac.Item]) -> xr.DataArray:
+def group_items(
+    items: list[pystac.Item],
+) -> list[tuple[np.datetime64, list[pystac.Item]]]:
     items = _filter_acquisition_time(items)
     items = add_nominal_datetime(items)
 
-    # get dates and tile IDs of the items
+    # group items by date and orbit state in a single pass; the orbit state is
+    # mapped to its sort order, so that descending comes before ascending
+    orbit_order = {"descending": 0, "ascending": 1}
     groups = defaultdict(list)
+    times_per_group = defaultdict(list)
     for item in items:
         date = item.properties["datetime_nominal"].date()
-        orbit = item.properties["sat:orbit_state"]
+        orbit = orbit_order[item.properties["sat:orbit_state"]]
         key = (date, orbit)
         groups[key].append(item)
+        times_per_group[key].append(item.datetime.replace(tzinfo=None))
 
     # Sort keys chronologically and descending before ascending
-    orbit_order = {"descending": 0, "ascending": 1}
-    sorted_keys = sorted(groups.keys(), key=lambda k: (k[0], orbit_order[k[1]]))
+    sorted_keys = sorted(groups)
 
-    grouped_items = np.empty(len(sorted_keys), dtype=object)
-    for i, k in enumerate(sorted_keys):
-        grouped_items[i] = groups[k]
-
-    # Mean timestamp per group
-    dts = np.empty(len(grouped_items), dtype="datetime64[s]")
-    for i, items in enumerate(grouped_items):
-        times = np.array(
-            [np.datetime64(item.datetime.replace(tzinfo=None)) for item in items]
-        )
+    grouped_items = []
+    for key in sorted_keys:
+        # Mean timestamp per group
+        times = np.array(times_per_group[key], dtype="datetime64[us]")
         mean_time = np.datetime64(int(times.view("int64").mean()), "us")
-        dts[i] = mean_time.astype("datetime64[s]")
+        grouped_items.append((mean_time.astype("datetime64[s]"), groups[key]))
 
-    da = xr.DataArray(grouped_items, dims=("time",), coords=dict(time=dts))
-    da["time"].encoding["units"] = "seconds since 1970-01-01"
-    da["time"].encoding["calendar"] = "standard"
-
-    return da
+    return grouped_items
 
 
 def _filter_acquisition_time(items: list[pystac.Item]) -> list[pystac.Item]:
@@ -230,19 +243,24 @@ def _filter_acquisition_time(items: list[pystac.Item]) -> list[pystac.Item]:
         groups[base_id].append(item)
 
     result = []
-    for base, grouped_items in groups.items():
-        # Prefer NT if exists
-        nt_items = [i for i in grouped_items if "_NT_" in i.id]
-        if nt_items:
-            # If multiple NTs, pick latest processing timestamp
-            latest_nt = max(nt_items, key=lambda x: _extract_timestamps(x.id)[-1])
-            result.append(latest_nt)
-        else:
-            # Otherwise pick NR (if exists)
-            nr_items = [i for i in grouped_items if "_NR_" in i.id]
-            if nr_items:
-                latest_nr = max(nr_items, key=lambda x: _extract_timestamps(x.id)[-1])
-                result.append(latest_nr)
+    for grouped_items in groups.values():
+        # Track the NT and NR items with the latest processing timestamp
+        # in a single pass
+        latest_nt = latest_nr = None
+        latest_nt_ts = latest_nr_ts = ""
+        for item in grouped_items:
+            if "_NT_" in item.id:
+                ts = _extract_timestamps(item.id)[-1]
+                if latest_nt is None or ts > latest_nt_ts:
+                    latest_nt, latest_nt_ts = item, ts
+            elif "_NR_" in item.id:
+                ts = _extract_timestamps(item.id)[-1]
+                if latest_nr is None or ts > latest_nr_ts:
+                    latest_nr, latest_nr_ts = item, ts
+        # Prefer NT if exists, otherwise pick NR (if exists)
+        latest = latest_nt if latest_nt is not None else latest_nr
+        if latest is not None:
+            result.append(latest)
 
     return result
 
@@ -265,6 +283,37 @@ def _get_base_id(item_id: str) -> str:
     return base
 
 
-def _extract_timestamps(item_id: str) -> list[str]:
-    # Matches YYYYMMDDThhmmss
-    return re.findall(r"\d{8}T\d{6}", item_id)
+@functools.lru_cache(maxsize=4096)
+def _extract_timestamps(item_id: str) -> tuple[str, ...]:
+    # the timestamps YYYYMMDDThhmmss are separate fields of the item ID, hence
+    # splitting at "_" avoids scanning the ID with a regular expression
+    return tuple(
+        part
+        for part in item_id.split("_")
+        if len(part) == 15
+        and part[8] == "T"
+        and part[:8].isdigit()
+        and part[9:].isdigit()
+    )
+
+
+def _assert_same_spatial_coords(dss: list[xr.Dataset]) -> None:
+    """Checks that all datasets share the spatial coordinates of the first one.
+
+    Args:
+        dss: Datasets of the individual time steps.
+
+    Raises:
+        DataStoreError: If the spatial coordinates of a dataset differ from
+            those of the first dataset.
+    """
+    ref = dss[0]
+    for ds in dss[1:]:
+        for dim in ds.dims:
+            if dim == "time" or dim not in ref.indexes or dim not in ds.indexes:
+                continue
+            if not ds.indexes[dim].equals(ref.indexes[dim]):
+                raise DataStoreError(
+                    f"Coordinate {dim!r} differs between the time steps; "
+                    f"the time steps cannot be stacked on a common grid."
+                )
@@ -5,7 +5,6 @@
 from collections.abc import Container, Iterator
 from typing import Any
 
-import pystac_client
 import xarray as xr
 from xcube.core.mldataset import MultiLevelDataset
 from xcube.core.store import (
@@ -17,12 +16,13 @@ from xcube.core.store import (
 )
 from xcube.util.jsonschema import JsonObjectSchema
 
-from .constants import EOPF_ZARR_OPENR_ID, STAC_URL
+from .constants import EOPF_ZARR_OPENR_ID, STAC_SEARCH_LIMIT
 from .prodhandler import ProductHandler
 from .prodhandlers import register_product_handlers
 from .utils import (
     filter_items_deprecated,
     filter_items_wrong_footprint,
+    get_stac_client,
 )
 
 
@@ -111,14 +111,18 @@ class EOPFZarrDataStore(DataStore):
 
         # search for items
         search_params = product_handler.prepare_stac_queries(data_id, open_params)
-        catalog = pystac_client.Client.open(STAC_URL)
-        items = list(catalog.search(**search_params).items())
+        search = get_stac_client().search(**search_params, limit=STAC_SEARCH_LIMIT)
+        items = list(search.items())
         # filter deprecated items
         items = filter_items_deprecated(items)
         # fiter items with incorrectly assigned footprint
         items = filter_items_wrong_footprint(items)
         if len(items) == 0:
-            raise DataStoreError(f"No items found for search_params {search_params}.")
+            raise DataStoreError(
+                f"No items found for collections {search_params['collections']}, "
+                f"bbox {open_params['bbox']} and datetime "
+                f"{search_params['datetime']}."
+            )
 
         return product_handler.open_data(data_id, items, **open_params)
 
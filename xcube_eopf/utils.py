@@ -3,19 +3,37 @@
 #  https://opensource.org/license/apache-2-0.
 
 import datetime
-from collections.abc import Sequence
+import functools
+import itertools
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 
 import dask.array as da
+import numba as nb
 import numpy as np
 import pyproj
 import pystac
+import pystac_client
 import xarray as xr
 from xcube_resampling.utils import get_spatial_coords
 
-from .constants import STAC_COLLECTIONS_URL, STAC_URL
+from .constants import LOG, MAX_OPEN_WORKERS, STAC_COLLECTIONS_URL, STAC_URL
 from .version import version
 
 
+@functools.lru_cache(maxsize=1)
+def get_stac_client() -> pystac_client.Client:
+    """Returns the client of the EOPF STAC API.
+
+    The client is opened once per process, so that the landing page and the
+    conformance classes are fetched only on the first item search.
+
+    Returns:
+        The client of the EOPF STAC API.
+    """
+    return pystac_client.Client.open(STAC_URL)
+
+
 def normalize_crs(crs: str | pyproj.CRS) -> pyproj.CRS:
     """Normalizes a CRS input by converting it to a pyproj.CRS object.
 
@@ -32,7 +50,71 @@ def normalize_crs(crs: str | pyproj.CRS) -> pyproj.CRS:
     if isinstance(crs, pyproj.CRS):
         return crs
     else:
-        return pyproj.CRS.from_string(crs)
+        return _get_crs_from_string(crs)
+
+
+@functools.lru_cache(maxsize=128)
+def _get_crs_from_string(crs: str) -> pyproj.CRS:
+    return pyproj.CRS.from_string(crs)
+
+
+def reproject_bbox(
+    source_bbox: Sequence[int | float],
+    source_crs: str | pyproj.CRS,
+    target_crs: str | pyproj.CRS,
+    densify_pts: int = 21,
+) -> Sequence[int | float]:
+    """Reprojects a bounding box from a source CRS to a target CRS.
+
+    If the source and target CRS are the same, the bounding box is returned
+    unchanged. CRS strings, transformers and reprojected bounding boxes are
+    cached, so repeated calls neither query the PROJ database nor rebuild the
+    transformation pipeline.
+
+    Between two geographic CRSs, the edges of the bounding box are not
+    densified, since the transformation maps them onto straight lines.
+
+    Args:
+        source_bbox: The bounding box, in the form (min_x, min_y, max_x, max_y).
+        source_crs: The source CRS, as a string or a `pyproj.CRS` object.
+        target_crs: The target CRS, as a string or a `pyproj.CRS` object.
+        densify_pts: Number of points added to each edge of the bounding box
+            to account for curved edges in the target CRS. Defaults to 21.
+
+    Returns:
+        The reprojected bounding box in the form (min_x, min_y, max_x, max_y).
+    """
+    # identical CRS identifiers need no normalization
+    if source_crs is target_crs or (
+        isinstance(source_crs, str) and source_crs == target_crs
+    ):
+        return source_bbox
+    source_crs = normalize_crs(source_crs)
+    target_crs = normalize_crs(target_crs)
+    if source_crs == target_crs:
+        return source_bbox
+    if source_crs.is_geographic and target_crs.is_geographic:
+        densify_pts = 0
+    return _transform_bbox(tuple(source_bbox), source_crs, target_crs, densify_pts)
+
+
+@functools.lru_cache(maxsize=256)
+def _transform_bbox(
+    bbox: tuple[int | float, ...],
+    source_crs: pyproj.CRS,
+    target_crs: pyproj.CRS,
+    densify_pts: int,
+) -> tuple[float, float, float, float]:
+    transformer = _get_transformer(source_crs, target_crs)
+    return transformer.transform_bounds(*bbox, densify_pts=densify_pts)
+
+
+@functools.lru_cache(maxsize=64)
+def _get_transformer(
+    source_crs: pyproj.CRS, target_crs: pyproj.CRS
+) -> pyproj.Transformer:
+    # CRS objects are hashed by their WKT, so equal CRSs share a transformer
+    return pyproj.Transformer.from_crs(source_crs, target_crs, always_xy=True)
 
 
 def add_nominal_datetime(items: Sequence[pystac.Item]) -> Sequence[pystac.Item]:
@@ -46,11 +128,23 @@ def add_nominal_datetime(items: Sequence[pystac.Item]) -> Sequence[pystac.Item]:
         A list of STAC item objects with the "datetime_nominal" field added to their
         properties.
     """
-
-    for item in items:
-        item.properties["center_point"] = get_center_from_bbox(item.bbox)
-        item.properties["datetime_nominal"] = convert_to_solar_time(
-            item.datetime, item.properties["center_point"][0]
+    if not items:
+        return items
+
+    # compute the center points and solar time offsets for all items at once
+    bboxes = np.array([item.bbox for item in items], dtype=np.float64)
+    center_x, center_y = get_center_from_bbox(bboxes.T)
+    utcs = np.array(
+        [item.datetime.replace(tzinfo=None) for item in items], dtype="datetime64[us]"
+    )
+    nominal_dts = convert_to_solar_time(utcs, center_x).tolist()
+
+    for item, center, nominal_dt in zip(
+        items, zip(center_x.tolist(), center_y.tolist()), nominal_dts
+    ):
+        item.properties["center_point"] = center
+        item.properties["datetime_nominal"] = nominal_dt.replace(
+            tzinfo=item.datetime.tzinfo
         )
     return items
 
@@ -69,24 +163,75 @@ def get_center_from_bbox(bbox: Sequence[int | float]) -> Sequence[int | float]:
 
 
 def convert_to_solar_time(
-    utc: datetime.datetime, longitude: float
-) -> datetime.datetime:
+    utc: datetime.datetime | np.ndarray, longitude: float | np.ndarray
+) -> datetime.datetime | np.ndarray:
     """Converts a UTC datetime to an approximate solar time based on longitude.
 
     The conversion assumes that each 15 degrees of longitude corresponds to a 1-hour
     offset from UTC, effectively snapping the time offset to whole-hour increments.
     This provides a simplified approximation of local solar time.
 
+    Arrays of datetimes and longitudes are converted at once, using NumPy
+    datetime arithmetic.
+
     Args:
-        utc: The datetime in UTC.
+        utc: The datetime in UTC, or an array of `datetime64` values in UTC.
         longitude: The longitude in degrees, where positive values are east of
-        the meridian.
+        the meridian, or an array of longitudes.
+
+    Returns:
+        A datetime object, or an array of `datetime64` values, representing the
+        approximate solar time.
+    """
+    if isinstance(utc, datetime.datetime):
+        offset_seconds = int(longitude / 15) * 3600
+        return utc + datetime.timedelta(seconds=offset_seconds)
+    offsets = np.trunc(np.asarray(longitude) / 15).astype(np.int64)
+    return np.asarray(utc) + offsets * np.timedelta64(3600, "s")
+
+
+def open_product(item: pystac.Item, **open_params) -> xr.Dataset | None:
+    """Opens the EOPF Zarr product referenced by a STAC item.
+
+    The product is opened lazily with the xarray-eopf backend, using the chunking
+    of the Zarr arrays. The backend reads the consolidated Zarr metadata, if
+    available, so that only one metadata request is made per product.
+
+    Args:
+        item: A STAC item with a `"product"` asset pointing to an EOPF Zarr product.
+        **open_params: Opening parameters passed to the xarray-eopf backend.
 
     Returns:
-        A datetime object representing the approximate solar time.
+        The opened dataset, or None if the product does not exist.
     """
-    offset_seconds = int(longitude / 15) * 3600
-    return utc + datetime.timedelta(seconds=offset_seconds)
+    href = item.assets["product"].href
+    try:
+        return xr.open_dataset(href, engine="eopf-zarr", chunks={}, **open_params)
+    except FileNotFoundError:
+        LOG.warning("File not found for STAC item %s (href=%s)", item.id, href)
+        return None
+
+
+def open_products(
+    items: Sequence[pystac.Item], **open_params
+) -> list[xr.Dataset | None]:
+    """Opens the EOPF Zarr products referenced by a sequence of STAC items.
+
+    Opening a product is dominated by fetching its metadata, hence the products
+    are opened concurrently in a thread pool. The data itself stays lazy.
+
+    Args:
+        items: STAC items with a `"product"` asset pointing to an EOPF Zarr product.
+        **open_params: Opening parameters passed to the xarray-eopf backend.
+
+    Returns:
+        The opened datasets in the order of `items`, where None marks a product
+        that does not exist.
+    """
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(MAX_OPEN_WORKERS, len(items))) as executor:
+        return list(executor.map(functools.partial(open_product, **open_params), items))
 
 
 def mosaic_spatial_take_first(list_ds: list[xr.Dataset]) -> xr.Dataset:
@@ -108,29 +253,77 @@ def mosaic_spatial_take_first(list_ds: list[xr.Dataset]) -> xr.Dataset:
     if len(list_ds) == 1:
         return list_ds[0]
 
-    x_coord, y_coord = get_spatial_coords(list_ds[0])
+    ref_ds = list_ds[0]
+    x_coord, y_coord = get_spatial_coords(ref_ds)
     ds_mosaic = xr.Dataset()
-    for key in list_ds[0]:
-        if list_ds[0][key].dims[-2:] == (y_coord, x_coord):
-            da_arr = da.stack([ds[key].data for ds in list_ds], axis=0)
-            nonnan_mask = ~da.isnan(da_arr)
-            first_non_nan_index = nonnan_mask.argmax(axis=0)
-            da_arr_select = da.choose(first_non_nan_index, da_arr)
+    for key, ref_var in ref_ds.data_vars.items():
+        if ref_var.dims[-2:] == (y_coord, x_coord):
+            # align the chunks with those of the first dataset; otherwise,
+            # da.stack would unify them to the finer intersection of all chunks
+            arrays = [da.asarray(ds[key].data) for ds in list_ds]
+            chunks = arrays[0].chunks
+            arrays = [
+                arr if arr.chunks == chunks else arr.rechunk(chunks) for arr in arrays
+            ]
+            if len(arrays) == 2:
+                # two datasets are combined element-wise, which avoids
+                # allocating the stacked 3D array
+                first, second = arrays
+                da_arr_select = da.where(da.isnan(first), second, first)
+            else:
+                da_arr = da.stack(arrays, axis=0)
+                # the stacked axis is contracted, so that its blocks are
+                # concatenated within each task instead of in a separate
+                # rechunk step
+                in_ind = tuple(range(da_arr.ndim))
+                da_arr_select = da.blockwise(
+                    _take_first_valid,
+                    in_ind[1:],
+                    da_arr,
+                    in_ind,
+                    concatenate=True,
+                    dtype=da_arr.dtype,
+                )
             ds_mosaic[key] = xr.DataArray(
                 da_arr_select,
-                dims=list_ds[0][key].dims,
-                coords=list_ds[0][key].coords,
-                attrs=list_ds[0][key].attrs,
+                dims=ref_var.dims,
+                coords=ref_var.coords,
+                attrs=ref_var.attrs,
             )
 
     # attributes are taken from the first UTM dataset
-    ds_mosaic.attrs = list_ds[0].attrs
+    ds_mosaic.attrs = ref_ds.attrs
 
     return ds_mosaic
 
 
+def _take_first_valid(arr: np.ndarray) -> np.ndarray:
+    """Returns the first non-NaN value along the first axis of the array.
+
+    Where all values along the first axis are NaN, the result is NaN.
+    """
+    arr_2d = np.ascontiguousarray(arr).reshape(arr.shape[0], -1)
+    return _take_first_valid_2d(arr_2d).reshape(arr.shape[1:])
+
+
+# the GIL is released, so that dask's threaded scheduler runs the blocks
+# concurrently; parallel=True would oversubscribe the dask worker threads
+@nb.njit(nogil=True, cache=True)
+def _take_first_valid_2d(arr: np.ndarray) -> np.ndarray:
+    # single pass over the data; only NaN pixels are looked up in the next layer
+    out = arr[0].copy()
+    for i in range(1, arr.shape[0]):
+        for j in range(arr.shape[1]):
+            if out[j] != out[j]:
+                out[j] = arr[i, j]
+    return out
+
+
 def add_attributes(
-    data_id: str, ds: xr.Dataset, grouped_items: xr.DataArray, **open_params
+    data_id: str,
+    ds: xr.Dataset,
+    grouped_items: Iterable[tuple[np.datetime64, Sequence[pystac.Item]]],
+    **open_params,
 ) -> xr.Dataset:
     """Adds metadata attributes to the final dataset.
 
@@ -142,7 +335,8 @@ def add_attributes(
 
     Parameters:
         ds: The input dataset to which attributes will be added.
-        grouped_items: An array containing STAC items grouped by time and tile ID.
+        grouped_items: Pairs of time step and STAC items, ordered by time; a time
+            step may occur multiple times, e.g. once per tile ID.
         **open_params: Opening parameters that are stored as a metadata attribute.
 
     Returns:
@@ -150,16 +344,12 @@ def add_attributes(
     """
     ds.attrs["stac_url"] = STAC_URL
     ds.attrs["stac_collection_url"] = f"{STAC_COLLECTIONS_URL}/collections/{data_id}"
-    ds.attrs["stac_items"] = dict(
-        {
-            dt.astype("datetime64[ms]")
-            .astype("O")
-            .isoformat(): [
-                item.id for item in np.sum(grouped_items.sel(time=dt).values)
-            ]
-            for dt in grouped_items.time.values
-        }
-    )
+    # collect the item IDs per time step in a single pass
+    stac_items = {}
+    for dt, items in grouped_items:
+        key = dt.astype("datetime64[ms]").astype("O").isoformat()
+        stac_items.setdefault(key, []).extend(item.id for item in items)
+    ds.attrs["stac_items"] = stac_items
     ds.attrs["open_params"] = open_params
     ds.attrs["xcube_eopf_version"] = version
 
@@ -175,12 +365,10 @@ def filter_items_deprecated(items: list[pystac.Item]) -> list[pystac.Item]:
     Returns:
         A list of STAC items that are not marked as deprecated.
     """
-    sel_items = []
-    for item in items:
-        deprecated = item.properties.get("deprecated", False)
-        if not deprecated:
-            sel_items.append(item)
-    return sel_items
+    deprecated = np.array(
+        [item.properties.get("deprecated", False) for item in items], dtype=bool
+    )
+    return list(itertools.compress(items, ~deprecated))
 
 
 def filter_items_wrong_footprint(items: list[pystac.Item]) -> list[pystac.Item]:
@@ -201,11 +389,8 @@ def filter_items_wrong_footprint(items: list[pystac.Item]) -> list[pystac.Item]:
     Notes:
         See related issue: https://github.com/EOPF-Sample-Service/eopf-stac/issues/39
     """
-    sel_items = []
-    for item in items:
-        if abs(item.bbox[2] - item.bbox[0]) < 180:
-            sel_items.append(item)
-    return sel_items
+    bboxes = np.array([item.bbox for item in items], dtype=np.float64).reshape(-1, 4)
+    return list(itertools.compress(items, np.abs(bboxes[:, 2] - bboxes[:, 0]) < 180))
 
 
 def bbox_to_geojson(bbox):
@@ -218,16 +403,19 @@ def bbox_to_geojson(bbox):
     Returns:
         dict: GeoJSON Polygon
     """
+    # only the immutable coordinates are cached; the dict is created per call
+    return {"type": "Polygon", "coordinates": _bbox_to_polygon_coords(tuple(bbox))}
+
+
+@functools.lru_cache(maxsize=256)
+def _bbox_to_polygon_coords(bbox: tuple[float, float, float, float]) -> tuple:
     min_x, min_y, max_x, max_y = bbox
-    return {
-        "type": "Polygon",
-        "coordinates": [
-            [
-                [min_x, min_y],
-                [max_x, min_y],
-                [max_x, max_y],
-                [min_x, max_y],
-                [min_x, min_y],
-            ]
-        ],
-    }
+    return (
+        (
+            (min_x, min_y),
+            (max_x, min_y),
+            (max_x, max_y),
+            (min_x, max_y),
+            (min_x, min_y),
+        ),
+    )
@@ -2,4 +2,4 @@
 #  Permissions are hereby granted under the terms of the Apache 2.0 License:
 #  https://opensource.org/license/apache-2-0.
 
-version = "0.3.3"
+version = "0.3.4.dev0"